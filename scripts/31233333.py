@@ -2,18 +2,38 @@
 from __future__ import annotations
 
 import argparse
+import bisect
+import contextlib
+import io
+import itertools
 import json
+import os
+import queue
+import re
 import shutil
 import struct
 import subprocess
 import sys
+import tempfile
 import threading
 import tkinter as tk
-from dataclasses import dataclass, asdict
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is not installed
+    orjson = None
 
 
 # ==========================================================
@@ -41,10 +61,43 @@ def format_path(value: str) -> str:
 # ==========================================================
 # SELF-HEALING TOOL DETECTION
 # ==========================================================
+TOOL_CACHE = ".tool_paths.json"
+
+
 def ensure_tools(tools_dir: Path) -> tuple[Path, Path, Path]:
     tools_dir = tools_dir.resolve()
     tools_dir.mkdir(exist_ok=True)
 
+    # Reuse the last probe while the tools folder is unchanged (keyed by its mtime)
+    cache = tools_dir / TOOL_CACHE
+    try:
+        data = json.loads(cache.read_text(encoding="utf-8"))
+        if data["key"] == tools_dir.stat().st_mtime_ns:
+            texconv, realesrgan, models = (Path(data[k]) for k in ("texconv", "realesrgan", "models"))
+            if all(os.path.exists(p) for p in (texconv, realesrgan, models)):
+                return texconv, realesrgan, models
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # missing or corrupt cache: probe again
+
+    tools = find_tools(tools_dir)
+    try:
+        # Create the entry first, then take the key and rewrite in place: adding
+        # (or atomically renaming) a file would bump the folder mtime past the key.
+        cache.touch(exist_ok=True)
+        texconv, realesrgan, models = tools
+        data = {
+            "key": tools_dir.stat().st_mtime_ns,
+            "texconv": str(texconv),
+            "realesrgan": str(realesrgan),
+            "models": str(models),
+        }
+        cache.write_text(json.dumps(data), encoding="utf-8")
+    except OSError:
+        pass  # read-only tools folder: just probe every time
+    return tools
+
+
+def find_tools(tools_dir: Path) -> tuple[Path, Path, Path]:
     texconv_candidates = [
         tools_dir / "texconv.exe",
         tools_dir / "TexConv.exe",
@@ -95,30 +148,131 @@ def ensure_tools(tools_dir: Path) -> tuple[Path, Path, Path]:
 # ==========================================================
 # DDS helpers
 # ==========================================================
+# magic, dwSize, dwFlags, dwHeight, dwWidth. DDS headers are always little-endian,
+# hence the explicit "<" rather than native byte order. For a 20-byte prefix one
+# os.read + a precompiled Struct beats mmap + int.from_bytes (no map/unmap calls).
+_DDS_HEADER = struct.Struct("<4sIIII")
+_O_BINARY = getattr(os, "O_BINARY", 0)
+_FICLONE = 0x40049409  # linux/fs.h
+
+
 def read_dds_size(path: Path) -> Tuple[int, int]:
-    with path.open("rb") as f:
-        if f.read(4) != b"DDS ":
-            raise ValueError("Not DDS")
-        header = f.read(124)
-    h = struct.unpack_from("<I", header, 8)[0]
-    w = struct.unpack_from("<I", header, 12)[0]
+    # One open + one 20-byte read; the rest of the header is unused
+    fd = os.open(path, os.O_RDONLY | _O_BINARY)
+    try:
+        buf = os.read(fd, _DDS_HEADER.size)
+    finally:
+        os.close(fd)
+    if len(buf) < _DDS_HEADER.size:
+        raise ValueError("Not DDS")
+    magic, _size, _flags, h, w = _DDS_HEADER.unpack(buf)
+    if magic != b"DDS ":
+        raise ValueError("Not DDS")
     return w, h
 
 
+def scan_tree(root: Path) -> Iterator[Path]:
+    """Yield every *.dds under root using os.scandir (cached DirEntry types, no per-entry stat)."""
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue  # unreadable folder
+        with it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.lower().endswith(".dds"):
+                    yield Path(e.path)
+
+
+def _probe(path: Path) -> Tuple[Path, Union[Tuple[int, int], Exception]]:
+    try:
+        return path, read_dds_size(path)
+    except Exception as exc:
+        return path, exc
+
+
+def scan_headers(
+    paths: Iterable[Path], workers: int = 32, chunk: int = 64
+) -> Iterator[Tuple[Path, Union[Tuple[int, int], Exception]]]:
+    """
+    Read DDS headers on a thread pool (pure I/O, so the GIL is no obstacle).
+    Paths are consumed in chunks so results stream out in input order.
+    Yields (path, (w, h)) or (path, exception).
+    """
+    it = iter(paths)
+    with ThreadPoolExecutor(workers, thread_name_prefix="header") as pool:
+        while True:
+            batch = list(itertools.islice(it, chunk))
+            if not batch:
+                return
+            yield from pool.map(_probe, batch)
+
+
+_NORMAL_RE = re.compile(r"_(?:n|nm|normal|norm)$", re.IGNORECASE)
+
+
 def is_normal_map(name: str) -> bool:
-    n = name.lower()
-    return any(x in n for x in ("_n.", "_nm.", "_normal.", "_norm."))
+    # Only the end of the stem counts: "foo_n.dds" is a normal map, "foo_n.mod.dds" is not
+    return bool(_NORMAL_RE.search(Path(name).stem))
+
+
+def _up_to_date(src: Path, dst: Path) -> bool:
+    """True when dst looks like an earlier copy2 of src (same size, not older)."""
+    try:
+        d = dst.stat()
+    except OSError:
+        return False
+    s = src.stat()
+    return d.st_size == s.st_size and d.st_mtime >= s.st_mtime
+
+
+def fast_clone(src: Path, dst: Path) -> None:
+    """
+    copy2 for copy-through files without copying bytes where possible:
+    reflink (copy-on-write clone, Btrfs/XFS) first, then a hardlink, then a
+    real shutil.copy2.
+    """
+    # Never write through an existing dst: it may itself be a hardlink to a source
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+
+    if fcntl is not None and sys.platform.startswith("linux"):
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            try:
+                os.unlink(dst)
+            except FileNotFoundError:
+                pass
+
+    try:
+        os.link(src, dst)  # same inode, so size/mtime already match the source
+        return
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+
+
+def scale_table(max_dim: int) -> tuple[tuple[int, int, int], tuple[int, int, int, int]]:
+    """
+    (edges, scales) such that scales[bisect_right(edges, max(w, h))] is the scale:
+    <700 -> x4, <1400 -> x2, otherwise x1, and always x1 at/above max_dim.
+    Edges are clamped to max_dim so they stay sorted for small caps.
+    """
+    return (min(700, max_dim), min(1400, max_dim), max_dim), (4, 2, 1, 1)
 
 
 def choose_scale(w: int, h: int, max_dim: int) -> int:
-    m = max(w, h)
-    if m >= max_dim:
-        return 1
-    if m < 700:
-        return 4
-    if m < 1400:
-        return 2
-    return 1
+    edges, scales = scale_table(max_dim)
+    return scales[bisect.bisect_right(edges, max(w, h))]
 
 
 # ==========================================================
@@ -136,6 +290,52 @@ class Result:
     message: Optional[str] = None
 
 
+@dataclass
+class Job:
+    index: int
+    src: Path
+    dst: Path
+    rel: Path
+    scratch: Path
+    width: int = 0
+    height: int = 0
+    scale: int = 1
+    kind: str = "unknown"
+    header_error: Optional[Exception] = None
+    png_in: Optional[Path] = None
+    png_out: Optional[Path] = None
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects surrogate-escaped (undecodable) filenames; json escapes them
+            pass
+    return json.dumps(obj).encode("utf-8")
+
+
+def write_manifest(journal: Path, manifest: Path, started: str, finished: str) -> None:
+    """
+    Wrap the per-file journal into the manifest object. Journal lines are
+    "<index>\\t<json>" in completion order; the manifest lists them in input order.
+    """
+    with journal.open("rb") as src:
+        entries = sorted(
+            (int(index), entry.rstrip())
+            for index, _, entry in (line.partition(b"\t") for line in src)
+            if entry.strip()
+        )
+    with manifest.open("wb") as out:
+        out.write(b'{"started": ' + _dumps(started) + b', "finished": ' + _dumps(finished) + b', "results": [')
+        sep = b"\n"
+        for _, entry in entries:
+            out.write(sep + entry)
+            sep = b",\n"
+        out.write(b"\n]}\n")
+
+
 # ==========================================================
 # CLI
 # ==========================================================
@@ -145,9 +345,24 @@ def parse_args():
     p.add_argument("--input", type=Path, default=root / "texture")
     p.add_argument("--output", type=Path, default=root / "output")
     p.add_argument("--tools", type=Path, default=root / "tools")
+    p.add_argument(
+        "--tmp",
+        type=Path,
+        help="Scratch folder for intermediate PNGs, e.g. a RAM disk or /dev/shm (default: system temp)",
+    )
     p.add_argument("--model", default="realesrgan-x4plus")
     p.add_argument("--gpu", type=int, default=0)
     p.add_argument("--max-dim", type=int, default=4096)
+    p.add_argument(
+        "--jobs",
+        help="realesrgan -j load:proc:save thread counts (default: half the CPUs for load/save, 2 per GPU)",
+    )
+    p.add_argument(
+        "--stall-timeout",
+        type=float,
+        default=60,
+        help="Kill realesrgan after this many seconds without output (0 disables)",
+    )
     p.add_argument("--overwrite", action="store_true")
     p.add_argument("--dry-run", action="store_true")
     p.add_argument("--pause", action="store_true")
@@ -158,170 +373,619 @@ def parse_args():
 # ==========================================================
 # Subprocess runner
 # ==========================================================
-def run(cmd: list[str], dry: bool) -> None:
+# Hide the console window Windows would otherwise allocate for every child
+_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+
+_active: set[subprocess.Popen] = set()
+_active_lock = threading.Lock()
+
+
+def run(cmd: list[str], dry: bool, stall_timeout: Optional[float] = None) -> None:
+    """
+    Run a tool, raising RuntimeError with the tail of its output on failure.
+    With stall_timeout, the tool is killed once it goes that many seconds
+    without printing a line (realesrgan reports progress per tile).
+    """
     if dry:
         return
-    r = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if r.returncode != 0:
-        raise RuntimeError(r.stderr or r.stdout)
+    p = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        creationflags=_CREATION_FLAGS,
+    )
+    with _active_lock:
+        _active.add(p)
+    try:
+        # Only the tail is useful on failure; realesrgan prints a line per tile
+        tail: deque[str] = deque(maxlen=200)
+        if not stall_timeout:
+            for line in p.stdout:
+                tail.append(line.rstrip())
+        else:
+            # A reader thread + queue timeout works for pipes on Windows too, unlike select()
+            lines: queue.Queue = queue.Queue()
+            threading.Thread(target=_pump, args=(p.stdout, lines), daemon=True).start()
+            while True:
+                try:
+                    line = lines.get(timeout=stall_timeout)
+                except queue.Empty:
+                    p.kill()
+                    p.wait()
+                    tail.append(f"stalled: no output for {stall_timeout:g}s, killed")
+                    raise RuntimeError("\n".join(tail))
+                if line is None:
+                    break
+                tail.append(line.rstrip())
+        code = p.wait()
+    finally:
+        with _active_lock:
+            _active.discard(p)
+    if code != 0:
+        raise RuntimeError("\n".join(tail) or f"exit code {code}")
+
+
+def _pump(stream, sink: queue.Queue) -> None:
+    for line in stream:
+        sink.put(line)
+    sink.put(None)
+
+
+def terminate_active() -> None:
+    """Terminate every texconv/realesrgan child currently started by run()."""
+    with _active_lock:
+        procs = list(_active)
+    for p in procs:
+        try:
+            p.terminate()
+        except OSError:
+            pass
 
 
 # ==========================================================
 # Pipeline
 # ==========================================================
-def dds_to_png(texconv: Path, src_dds: Path, tmp_dir: Path, dry: bool) -> Path:
+# Several pipeline workers run texconv at once; -singleproc keeps each one from
+# spawning a thread per core on top of that.
+def dds_to_png(texconv: str, src_dds: Path, tmp_dir: Path, dry: bool) -> Path:
     """
     texconv always outputs: <tmp_dir>/<src_stem>.png
     """
-    run([str(texconv), "-ft", "png", "-y", "-o", str(tmp_dir), str(src_dds)], dry)
+    run([texconv, "-nologo", "-singleproc", "-ft", "png", "-y", "-o", os.fspath(tmp_dir), os.fspath(src_dds)], dry)
     return tmp_dir / f"{src_dds.stem}.png"
 
 
+def default_jobs() -> str:
+    io_threads = max(2, (os.cpu_count() or 2) // 2)
+    return f"{io_threads}:2:{io_threads}"
+
+
 def upscale_png(
-    realesrgan: Path,
-    models_dir: Path,
+    realesrgan: str,
+    models_dir: str,
     inp_png: Path,
     out_png: Path,
     scale: int,
     model: str,
     gpu: int,
+    jobs: str,
     dry: bool,
+    stall_timeout: Optional[float] = None,
 ) -> None:
     run(
         [
-            str(realesrgan),
+            realesrgan,
             "-i",
-            str(inp_png),
+            os.fspath(inp_png),
             "-o",
-            str(out_png),
+            os.fspath(out_png),
             "-s",
             str(scale),
             "-n",
             model,
             "-m",
-            str(models_dir),  # critical for EXE/CWD
+            models_dir,  # critical for EXE/CWD
             "-g",
             str(gpu),
+            "-j",
+            jobs,  # load:proc:save threads, lets PNG I/O overlap GPU compute
             "-f",
             "png",
         ],
         dry,
+        stall_timeout,
     )
 
 
-def png_to_dds(texconv: Path, src_png: Path, out_dir: Path, dds_format: str, dry: bool) -> Path:
+def png_to_dds_batch(
+    texconv: str, src_pngs: List[Path], out_dir: Path, dds_format: str, gpu: Optional[int], dry: bool
+) -> List[Path]:
     """
-    texconv outputs: <out_dir>/<src_png_stem>.dds
+    One texconv call for several PNGs (format tables and DXGI set up once).
+    texconv outputs: <out_dir>/<src_png_stem>.dds for each input
     """
-    run([str(texconv), "-y", "-f", dds_format, "-m", "0", "-o", str(out_dir), str(src_png)], dry)
-    return out_dir / f"{src_png.stem}.dds"
+    cmd = [texconv, "-nologo", "-singleproc", "-y", "-f", dds_format, "-m", "0"]
+    if gpu is not None and dds_format.startswith("BC"):
+        # BC6H/BC7 compression via DirectCompute on the given adapter instead of every CPU core
+        cmd += ["-gpu", str(gpu)]
+    run(cmd + ["-o", os.fspath(out_dir)] + [os.fspath(p) for p in src_pngs], dry)
+    return [out_dir / f"{p.stem}.dds" for p in src_pngs]
+
+
+def texconv_chunks(jobs: List[Job]) -> Iterator[List[Job]]:
+    """Split a batch so each texconv command line stays well below Windows' 8191-char limit."""
+    chunk: List[Job] = []
+    length = 0
+    for job in jobs:
+        cost = len(str(job.png_out)) + 3
+        if chunk and (len(chunk) >= TEXCONV_BATCH or length + cost > TEXCONV_CMDLINE_BUDGET):
+            yield chunk
+            chunk, length = [], 0
+        chunk.append(job)
+        length += cost
+    if chunk:
+        yield chunk
+
+
+# ==========================================================
+# Staged runner
+# ==========================================================
+_STOP = object()
+UPSCALE_BATCH = 16
+TEXCONV_BATCH = 64
+TEXCONV_CMDLINE_BUDGET = 6000
+
+
+class Pipeline:
+    """
+    decode (texconv, CPU) -> upscale (realesrgan, GPU) -> encode (texconv, CPU)
+
+    Each stage has its own worker pool and hands jobs on through a bounded
+    queue, so the GPU keeps upscaling while neighbouring files are decoded and
+    re-encoded. The upscale stage has a single worker to keep the GPU serialized.
+    """
+
+    def __init__(
+        self,
+        args,
+        texconv: Path,
+        realesrgan: Path,
+        models: Path,
+        tmp: Path,
+        journal: BinaryIO,
+        stop_event: Optional[threading.Event] = None,
+    ) -> None:
+        self.args = args
+        # Converted once here instead of str()-ing every tool path per call
+        self.texconv = os.fspath(texconv)
+        self.realesrgan = os.fspath(realesrgan)
+        self.models = os.fspath(models)
+        self.tmp = tmp
+        self.journal = journal
+        self.jobs = args.jobs or default_jobs()
+        self.texconv_gpu: Optional[int] = args.gpu
+        self._edges, self._scales = scale_table(args.max_dim)
+        self.stop_event = stop_event or threading.Event()
+        self.counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._batch_ids = itertools.count()
+
+    # ---- stages ------------------------------------------------------
+    def stage_decode(self, job: Job) -> Optional[Job]:
+        """Classify the file and convert it to PNG. Returns None when no upscale is needed."""
+        if job.header_error is not None:
+            raise job.header_error
+        if job.kind == "normal":
+            job.scale = 1
+        else:
+            # choose_scale, inlined: one C-level bisect over the precomputed edges
+            job.scale = self._scales[bisect.bisect_right(self._edges, max(job.width, job.height))]
+
+        if job.dst.exists() and not self.args.overwrite:
+            result = Result(str(job.src), str(job.dst), "skipped", job.width, job.height, job.scale, job.kind)
+            self._finish(job, "SKIPPED", result)
+            return None
+
+        # For normals, we copy (safe). You can change later if you want x2 normals.
+        if job.scale == 1:
+            if _up_to_date(job.src, job.dst):
+                result = Result(
+                    str(job.src), str(job.dst), "skipped", job.width, job.height, job.scale, job.kind, "unchanged"
+                )
+                self._finish(job, "SKIPPED (unchanged)", result)
+                return None
+            if not self.args.dry_run:
+                fast_clone(job.src, job.dst)
+            result = Result(str(job.src), str(job.dst), "ok", job.width, job.height, job.scale, job.kind, "copied")
+            self._finish(job, "OK (copy)", result)
+            return None
+
+        # 1) DDS -> PNG (per-job scratch dir: texconv names outputs after the source stem)
+        job.scratch.mkdir(parents=True, exist_ok=True)
+        job.png_in = dds_to_png(self.texconv, job.src, job.scratch, self.args.dry_run)
+        return job
+
+    def stage_upscale(self, jobs: List[Job]) -> List[Job]:
+        """
+        Upscale a batch of decoded jobs, loading the model once per scale factor.
+
+        Returns the jobs that were upscaled; failures are recorded here.
+        """
+        buckets: Dict[int, List[Job]] = {}
+        for job in jobs:
+            # 2) AI upscale -> PNG (new name we control)
+            job.png_out = job.scratch / f"{job.src.stem}_up.png"
+            buckets.setdefault(job.scale, []).append(job)
+
+        done: List[Job] = []
+        for scale, group in buckets.items():
+            # Checked before every launch so Stop is not followed by fresh realesrgan runs
+            if self.stop_event.is_set():
+                return done
+            if len(group) > 1 and not self.args.dry_run:
+                try:
+                    self._upscale_folder(scale, group)
+                    done.extend(group)
+                    continue
+                except Exception as exc:
+                    if self.stop_event.is_set():
+                        raise  # killed by Stop, not a realesrgan failure
+                    print(f"  batch upscale x{scale} failed, retrying per file: {exc}")
+            for job in group:
+                if self.stop_event.is_set():
+                    return done
+                try:
+                    upscale_png(
+                        self.realesrgan,
+                        self.models,
+                        job.png_in,
+                        job.png_out,
+                        job.scale,
+                        self.args.model,
+                        self.args.gpu,
+                        self.jobs,
+                        self.args.dry_run,
+                        self.args.stall_timeout,
+                    )
+                except Exception as exc:
+                    if self.stop_event.is_set():
+                        raise
+                    self._fail(job, exc)
+                    continue
+                done.append(job)
+        return done
+
+    def _upscale_folder(self, scale: int, group: List[Job]) -> None:
+        batch = self.tmp / f"batch_{next(self._batch_ids)}"
+        in_dir = batch / f"in_s{scale}"
+        out_dir = batch / f"out_s{scale}"
+        in_dir.mkdir(parents=True)
+        out_dir.mkdir()
+        try:
+            # Job indices keep names unique inside the shared folder
+            for job in group:
+                staged = in_dir / f"{job.index}.png"
+                try:
+                    os.link(job.png_in, staged)
+                except OSError:
+                    shutil.copy(job.png_in, staged)
+            upscale_png(
+                self.realesrgan,
+                self.models,
+                in_dir,
+                out_dir,
+                scale,
+                self.args.model,
+                self.args.gpu,
+                self.jobs,
+                False,
+                self.args.stall_timeout,
+            )
+            for job in group:
+                (out_dir / f"{job.index}.png").replace(job.png_out)
+        finally:
+            shutil.rmtree(batch, ignore_errors=True)
+
+    def stage_encode(self, jobs: List[Job]) -> None:
+        """
+        Encode upscaled PNGs back to DDS with one texconv call per output folder
+        (and chunk), then move each file to its mirrored name.
+        """
+        # 3) PNG -> DDS (writes <stem>_up.dds) then rename to mirrored path
+        fmt = "BC7_UNORM"  # color default
+        by_dir: Dict[Path, List[Job]] = {}
+        for job in jobs:
+            by_dir.setdefault(job.dst.parent, []).append(job)
+
+        for out_dir, group in by_dir.items():
+            for chunk in texconv_chunks(group):
+                if self.stop_event.is_set():
+                    return
+                try:
+                    produced = self._encode([j.png_out for j in chunk], out_dir, fmt)
+                except Exception as exc:
+                    if self.stop_event.is_set():
+                        raise  # killed by Stop, not a texconv failure
+                    if len(chunk) == 1:
+                        self._fail(chunk[0], exc)
+                        continue
+                    # Isolate the failing file(s)
+                    produced = []
+                    for job in list(chunk):
+                        if self.stop_event.is_set():
+                            return
+                        try:
+                            produced.extend(self._encode([job.png_out], out_dir, fmt))
+                        except Exception as exc:
+                            if self.stop_event.is_set():
+                                raise
+                            self._fail(job, exc)
+                            chunk.remove(job)
+                for job, produced_dds in zip(chunk, produced):
+                    try:
+                        self._place(job, produced_dds)
+                    except Exception as exc:
+                        self._fail(job, exc)
+
+    def _encode(self, pngs: List[Path], out_dir: Path, fmt: str) -> List[Path]:
+        gpu = self.texconv_gpu
+        try:
+            return png_to_dds_batch(self.texconv, pngs, out_dir, fmt, gpu, self.args.dry_run)
+        except Exception as exc:
+            # A child terminated by Stop says nothing about -gpu support
+            if gpu is None or self.stop_event.is_set():
+                raise
+            # Some texconv builds lack -gpu and some machines lack a usable D3D11 device
+            produced = png_to_dds_batch(self.texconv, pngs, out_dir, fmt, None, self.args.dry_run)
+            self.texconv_gpu = None
+            print(f"  WARNING: texconv -gpu {gpu} failed, encoding on CPU from now on ({str(exc).splitlines()[-1]})")
+            return produced
+
+    def _place(self, job: Job, produced_dds: Path) -> None:
+        # Rename produced file to desired mirrored name if needed; os.replace
+        # overwrites atomically on both POSIX and Windows
+        produced_str = os.fspath(produced_dds)
+        dst_str = os.fspath(job.dst)
+        if not self.args.dry_run and produced_str != dst_str:
+            os.replace(produced_str, dst_str)
+
+        result = Result(str(job.src), str(job.dst), "ok", job.width, job.height, job.scale, job.kind)
+        self._finish(job, f"OK ({job.kind}, x{job.scale})", result)
+
+    # ---- plumbing ----------------------------------------------------
+    def _finish(self, job: Job, line: str, result: Result) -> None:
+        with self._lock:
+            print(f"[{job.index}] {job.rel}\n  {line}")
+            # One JSON line per file as it completes, so a crash still leaves a partial manifest
+            self.journal.write(b"%d\t" % job.index + _dumps(result.__dict__) + b"\n")
+            self.journal.flush()
+            self.counts[result.status] += 1
+        shutil.rmtree(job.scratch, ignore_errors=True)
+
+    def _fail(self, job: Job, exc: Exception) -> None:
+        # width/height stay 0 if the header itself could not be read
+        result = Result(str(job.src), str(job.dst), "error", job.width, job.height, 0, job.kind, str(exc))
+        self._finish(job, f"ERROR: {exc}", result)
+
+    def _worker(self, stage, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        # A worker never exits before _STOP: an unexpected error (e.g. the journal
+        # write in _fail) is held and re-raised once the inbox has been drained
+        error: Optional[Exception] = None
+        while True:
+            job = inbox.get()
+            if job is _STOP:
+                break
+            if error is not None or self.stop_event.is_set():
+                continue  # keep draining so upstream puts never block
+            try:
+                try:
+                    out = stage(job)
+                except Exception as exc:
+                    if self.stop_event.is_set():
+                        continue  # the tool was terminated by Stop, not a failure
+                    self._fail(job, exc)
+                    continue
+                if out is not None:
+                    outbox.put(out)
+            except Exception as exc:
+                error = exc
+        if error is not None:
+            raise error
+
+    def _batch_worker(self, stage, inbox: queue.Queue, outbox: Optional[queue.Queue], limit: int) -> None:
+        """Like _worker, but hands the stage whatever jobs are already queued (up to limit)."""
+        error: Optional[Exception] = None
+        stopping = False
+        while not stopping:
+            batch: List[Job] = []
+            job = inbox.get()
+            while True:
+                if job is _STOP:
+                    stopping = True
+                    break
+                if error is None and not self.stop_event.is_set():
+                    batch.append(job)
+                if len(batch) >= limit:
+                    break
+                try:
+                    job = inbox.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                out = stage(batch)
+                if outbox is not None:
+                    for job in out:
+                        outbox.put(job)
+            except Exception as exc:
+                # Stages re-raise once Stop has terminated their tool; that is not an error
+                if not self.stop_event.is_set():
+                    error = exc
+        if error is not None:
+            raise error
+
+    def _feed(self, files: Iterable[Path], inbox: queue.Queue) -> None:
+        for i, (src, size) in enumerate(scan_headers(files), 1):
+            if self.stop_event.is_set():
+                break
+            rel = src.relative_to(self.args.input)
+            job = Job(i, src, self.args.output / rel, rel, self.tmp / str(i))
+            # Classified once here; the error path reports the same kind
+            job.kind = "normal" if is_normal_map(src.name) else "color"
+            if isinstance(size, Exception):
+                job.header_error = size
+            else:
+                job.width, job.height = size
+            try:
+                job.dst.parent.mkdir(parents=True, exist_ok=True)
+            except Exception as exc:
+                # e.g. a file where the mirrored folder should be: fail this file, keep feeding
+                self._fail(job, exc)
+                continue
+            inbox.put(job)
+
+    def run(self, files: Iterable[Path]) -> Counter[str]:
+        cpu = os.cpu_count() or 2
+        n_decode = n_encode = max(1, cpu // 2)
+
+        decode_q: queue.Queue = queue.Queue(maxsize=4)
+        upscale_q: queue.Queue = queue.Queue(maxsize=UPSCALE_BATCH)
+        encode_q: queue.Queue = queue.Queue(maxsize=UPSCALE_BATCH)
+
+        decoders = ThreadPoolExecutor(n_decode, thread_name_prefix="decode")
+        upscalers = ThreadPoolExecutor(1, thread_name_prefix="upscale")
+        encoders = ThreadPoolExecutor(n_encode, thread_name_prefix="encode")
+        stages = [
+            (decoders, decode_q, [
+                decoders.submit(self._worker, self.stage_decode, decode_q, upscale_q) for _ in range(n_decode)
+            ]),
+            (upscalers, upscale_q, [
+                upscalers.submit(self._batch_worker, self.stage_upscale, upscale_q, encode_q, UPSCALE_BATCH)
+            ]),
+            (encoders, encode_q, [
+                encoders.submit(self._batch_worker, self.stage_encode, encode_q, None, TEXCONV_BATCH)
+                for _ in range(n_encode)
+            ]),
+        ]
+
+        errors: List[BaseException] = []
+        # A future (not a bare thread) so an exception in the feeder reaches the caller
+        feeder = ThreadPoolExecutor(1, thread_name_prefix="feed")
+        try:
+            feeder.submit(self._feed, files, decode_q).result()
+        finally:
+            feeder.shutdown()
+            # Shut stages down front to back so every queued job is drained first.
+            # Every stage gets its _STOP even if an earlier one failed, or its
+            # workers would block on get() forever.
+            for pool, inbox, futures in stages:
+                for _ in futures:
+                    inbox.put(_STOP)
+                for fut in futures:
+                    try:
+                        fut.result()
+                    except Exception as exc:
+                        errors.append(exc)
+                pool.shutdown()
+        if errors:
+            raise errors[0]
+
+        return self.counts
 
 
 # ==========================================================
 # MAIN (CLI)
 # ==========================================================
-def run_pipeline(args) -> int:
+def run_pipeline(args, stop_event: Optional[threading.Event] = None) -> int:
     try:
         texconv, realesrgan, models = ensure_tools(args.tools)
     except Exception as exc:
         print(exc)
-        pause(True)
         return 1
 
-    args.output.mkdir(parents=True, exist_ok=True)
-    tmp = args.output / "_tmp"
-    tmp.mkdir(exist_ok=True)
+    # Intermediate PNGs (up to 16x the source pixels) go to scratch space, not the output drive
+    try:
+        args.output.mkdir(parents=True, exist_ok=True)
+        if args.tmp is not None:
+            args.tmp.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix="dds_ai_", dir=args.tmp))
+    except OSError as exc:
+        print(f"ERROR: cannot create output/scratch folder: {exc}")
+        return 1
 
-    files = list(args.input.rglob("*.dds"))
-    print(f"Found {len(files)} DDS files")
+    # Streamed: the first file starts decoding while the tree is still being walked
+    files = scan_tree(args.input)
     print(f"Input : {args.input.resolve()}")
     print(f"Output: {args.output.resolve()}")
     print(f"texconv: {texconv}")
     print(f"realesrgan: {realesrgan}")
     print(f"models: {models}")
+    print(f"scratch: {tmp}")
     print(f"model: {args.model}\n")
 
-    results: List[Result] = []
+    manifest = args.output / "processing_manifest.json"
+    journal_path = manifest.with_suffix(".jsonl")
     start = datetime.utcnow().isoformat() + "Z"
-
-    for i, src in enumerate(files, 1):
-        rel = src.relative_to(args.input)
-        dst = args.output / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-
-        print(f"[{i}/{len(files)}] {rel}")
-
-        try:
-            w, h = read_dds_size(src)
-            kind = "normal" if is_normal_map(src.name) else "color"
-            scale = 1 if kind == "normal" else choose_scale(w, h, args.max_dim)
-
-            if dst.exists() and not args.overwrite:
-                print("  SKIPPED")
-                results.append(Result(str(src), str(dst), "skipped", w, h, scale, kind))
-                continue
-
-            # For normals, we copy (safe). You can change later if you want x2 normals.
-            if scale == 1:
-                if not args.dry_run:
-                    shutil.copy2(src, dst)
-                print("  OK (copy)")
-                results.append(Result(str(src), str(dst), "ok", w, h, scale, kind, "copied"))
-                continue
-
-            # 1) DDS -> PNG
-            png_in = dds_to_png(texconv, src, tmp, args.dry_run)
-
-            # 2) AI upscale -> PNG (new name we control)
-            png_out = tmp / f"{src.stem}_up.png"
-            upscale_png(realesrgan, models, png_in, png_out, scale, args.model, args.gpu, args.dry_run)
-
-            # 3) PNG -> DDS (writes <stem>_up.dds) then rename to mirrored path
-            out_dds_dir = dst.parent
-            fmt = "BC7_UNORM"  # color default
-            produced_dds = png_to_dds(texconv, png_out, out_dds_dir, fmt, args.dry_run)
-
-            # Rename produced file to desired mirrored name if needed
-            if not args.dry_run:
-                if produced_dds.resolve() != dst.resolve():
-                    if dst.exists():
-                        dst.unlink()
-                    produced_dds.replace(dst)
-
-            print(f"  OK (color, x{scale})")
-            results.append(Result(str(src), str(dst), "ok", w, h, scale, kind))
-
-        except Exception as exc:
-            print(f"  ERROR: {exc}")
-            # best effort width/height if available
+    failure: Optional[Exception] = None
+    try:
+        with journal_path.open("wb") as journal:
+            pipeline = Pipeline(args, texconv, realesrgan, models, tmp, journal, stop_event)
             try:
-                w, h = read_dds_size(src)
-            except Exception:
-                w, h = 0, 0
-            results.append(Result(str(src), str(dst), "error", w, h, 0, "unknown", str(exc)))
-
-    manifest = {
-        "started": start,
-        "finished": datetime.utcnow().isoformat() + "Z",
-        "results": [asdict(r) for r in results],
-    }
-    (args.output / "processing_manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-
-    ok = sum(1 for r in results if r.status == "ok")
-    skipped = sum(1 for r in results if r.status == "skipped")
-    errors = sum(1 for r in results if r.status == "error")
+                pipeline.run(files)
+            except Exception as exc:
+                # Every file that finished is already in the journal; still write the manifest
+                failure = exc
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    write_manifest(journal_path, manifest, start, datetime.utcnow().isoformat() + "Z")
+    journal_path.unlink()
+
+    counts = pipeline.counts
+    if failure is not None:
+        print(f"\nERROR: pipeline aborted: {failure}")
+        print(f"Partial manifest: {manifest}")
+        return 1
+
+    ok = counts["ok"]
+    skipped = counts["skipped"]
+    errors = counts["error"]
 
     print("\nDONE.")
+    print(f"Found {sum(counts.values())} DDS files")
     print(f"OK={ok}  SKIPPED={skipped}  ERRORS={errors}")
-    print(f"Manifest: {args.output / 'processing_manifest.json'}")
+    print(f"Manifest: {manifest}")
 
-    pause(args.pause)
     return 0 if errors == 0 else 2
 
 
 # ==========================================================
 # UI
 # ==========================================================
+class _QueueWriter(io.TextIOBase):
+    """stdout replacement that forwards complete lines to the GUI's log queue."""
+
+    def __init__(self, sink: queue.Queue) -> None:
+        self.sink = sink
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            self.sink.put(line)
+        return len(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            line, self._partial = self._partial, ""
+        if line:
+            self.sink.put(line)
+
+
 class ProcessingUI(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
@@ -338,16 +1002,16 @@ class ProcessingUI(tk.Tk):
         self.max_dim_var = tk.IntVar(value=4096)
         self.overwrite_var = tk.BooleanVar(value=False)
         self.dry_run_var = tk.BooleanVar(value=False)
-        self.pause_var = tk.BooleanVar(value=False)
 
         self.status_var = tk.StringVar(value="Idle")
-        self.process: Optional[subprocess.Popen[str]] = None
-        self.reader_thread: Optional[threading.Thread] = None
-        self.stop_requested = False
+        self.worker: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.log_queue: queue.Queue[str] = queue.Queue()
 
         self._configure_styles()
         self._build_layout()
         self._set_idle_state()
+        self.after(50, self._drain_log)
 
     def _configure_styles(self) -> None:
         style = ttk.Style(self)
@@ -396,7 +1060,6 @@ class ProcessingUI(tk.Tk):
         flags.pack(fill=tk.X, expand=False, pady=(0, 10))
         ttk.Checkbutton(flags, text="Overwrite", variable=self.overwrite_var).pack(side=tk.LEFT, padx=4)
         ttk.Checkbutton(flags, text="Dry run", variable=self.dry_run_var).pack(side=tk.LEFT, padx=4)
-        ttk.Checkbutton(flags, text="Pause on finish", variable=self.pause_var).pack(side=tk.LEFT, padx=4)
 
         status_frame = ttk.Frame(container, style="App.TFrame")
         status_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
@@ -463,81 +1126,80 @@ class ProcessingUI(tk.Tk):
         self.status_var.set("Idle")
         self.status_label.configure(foreground="#c7ced4")
 
+    def _drain_log(self) -> None:
+        # One insert + scroll per 50 ms tick, however many lines arrived
+        lines = []
+        while True:
+            try:
+                lines.append(self.log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self._log("\n".join(lines))
+        self.after(50, self._drain_log)
+
     def start_processing(self) -> None:
-        if self.process and self.process.poll() is None:
+        if self.worker and self.worker.is_alive():
             messagebox.showinfo("Processing", "A run is already in progress.")
             return
 
-        command = [
-            sys.executable,
-            format_path(Path(__file__)),
-            "--input",
-            format_path(self.input_var.get()),
-            "--output",
-            format_path(self.output_var.get()),
-            "--tools",
-            format_path(self.tools_var.get()),
-            "--model",
-            self.model_var.get(),
-            "--gpu",
-            str(self.gpu_var.get()),
-            "--max-dim",
-            str(self.max_dim_var.get()),
-        ]
-        if self.overwrite_var.get():
-            command.append("--overwrite")
-        if self.dry_run_var.get():
-            command.append("--dry-run")
-        if self.pause_var.get():
-            command.append("--pause")
-
-        self._log("Running: " + " ".join(command))
-        self.stop_requested = False
-
         try:
-            self.process = subprocess.Popen(
-                command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+            args = argparse.Namespace(
+                input=Path(format_path(self.input_var.get())),
+                output=Path(format_path(self.output_var.get())),
+                tools=Path(format_path(self.tools_var.get())),
+                tmp=None,
+                model=self.model_var.get(),
+                gpu=self.gpu_var.get(),
+                max_dim=self.max_dim_var.get(),
+                jobs=None,
+                stall_timeout=60,
+                overwrite=self.overwrite_var.get(),
+                dry_run=self.dry_run_var.get(),
+                pause=False,
+                gui=False,
             )
-        except OSError as exc:
-            self._log(f"Failed to start process: {exc}")
+        except tk.TclError as exc:
+            messagebox.showerror("Invalid setting", str(exc))
             return
 
+        self._log(f"Running: input={args.input} output={args.output} model={args.model}")
+        self.stop_event.clear()
         self._set_running_state()
-        self.reader_thread = threading.Thread(target=self._stream_output, daemon=True)
-        self.reader_thread.start()
+        # Same interpreter, background thread: no second Python start-up per run
+        self.worker = threading.Thread(target=self._run_in_thread, args=(args,), daemon=True)
+        self.worker.start()
 
     def stop_processing(self) -> None:
-        if not self.process or self.process.poll() is not None:
+        if not self.worker or not self.worker.is_alive():
             return
-        self.stop_requested = True
+        self.stop_event.set()
         self.status_var.set("Stopping...")
         self.status_label.configure(foreground="#4a90e2")
-        try:
-            self.process.terminate()
-        except OSError as exc:
-            self._log(f"Failed to stop process: {exc}")
+        terminate_active()
 
-    def _stream_output(self) -> None:
-        if not self.process or not self.process.stdout:
-            return
-        for line in self.process.stdout:
-            self.after(0, lambda msg=line.rstrip(): self._log(msg))
-        code = self.process.wait()
+    def _run_in_thread(self, args: argparse.Namespace) -> None:
+        try:
+            # redirect_stdout swaps sys.stdout process-wide, which also captures the pipeline's worker threads
+            with contextlib.redirect_stdout(_QueueWriter(self.log_queue)):
+                code = run_pipeline(args, self.stop_event)
+        except Exception as exc:
+            self.log_queue.put(f"ERROR: {exc}")
+            code = 1
         self.after(0, lambda: self._finish_run(code))
 
     def _finish_run(self, code: int) -> None:
-        if code == 0:
-            self.status_var.set("Done")
-            self.status_label.configure(foreground="#3fb27f")
-        elif self.stop_requested:
+        if self.stop_event.is_set():
             self.status_var.set("Stopped")
             self.status_label.configure(foreground="#ff6b6b")
+        elif code == 0:
+            self.status_var.set("Done")
+            self.status_label.configure(foreground="#3fb27f")
         else:
             self.status_var.set(f"Failed (code {code})")
             self.status_label.configure(foreground="#ff6b6b")
 
-        self.process = None
-        self.stop_requested = False
+        self.worker = None
         self._set_idle_state()
 
 
@@ -551,7 +1213,9 @@ def main() -> int:
     if args.gui:
         launch_gui()
         return 0
-    return run_pipeline(args)
+    code = run_pipeline(args)
+    pause(args.pause or code == 1)
+    return code
 
 
 if __name__ == "__main__":
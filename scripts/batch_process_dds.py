@@ -8,16 +8,30 @@ back to GitHub for archival.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
 import json
 import os
+import re
 import shlex
+import shutil
+import string
 import subprocess
 import sys
 import struct
-from dataclasses import asdict, dataclass
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is not installed
+    orjson = None
 
 # Default to CPU execution by hiding accelerator devices from common runtimes
 os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
@@ -38,6 +52,35 @@ class ProcessingResult:
     message: Optional[str] = None
 
 
+_RESULT_FIELDS = tuple(f.name for f in fields(ProcessingResult))
+
+
+@dataclass
+class FileTask:
+    """A discovered file with its header size and processing decision."""
+
+    source: str
+    output: str
+    rel: str
+    width: int
+    height: int
+    kind: str
+    scale: int
+
+
+@dataclass
+class ProcessingOptions:
+    """Run-wide settings shared by every file."""
+
+    command_template: Optional[CommandTemplate]
+    dry_run: bool
+    overwrite: bool
+    base_env: Dict[str, str]
+    daemon: Optional[ModelDaemon] = None
+    existing_outputs: Optional[set[str]] = None
+    cwd: Optional[str] = None
+
+
 @dataclass
 class RunSummary:
     model_name: str
@@ -53,25 +96,42 @@ class RunSummary:
 
 DEFAULT_MODEL_NAME = os.environ.get("DDS_MODEL_NAME", "custom-model")
 DEFAULT_MODEL_CMD = os.environ.get("DDS_MODEL_CMD")
+DEFAULT_MODEL_DAEMON_CMD = os.environ.get("DDS_MODEL_DAEMON_CMD")
 DEFAULT_GIT_REMOTE = os.environ.get("DDS_GIT_REMOTE", "origin")
 DEFAULT_GIT_BRANCH = os.environ.get("DDS_GIT_BRANCH", "main")
 DEFAULT_OUTPUT_DIR = os.environ.get("DDS_OUTPUT_DIR", "output")
 DEFAULT_MAX_DIM = int(os.environ.get("DDS_MAX_DIM", "4096"))
+DEFAULT_JOBS = int(os.environ.get("DDS_JOBS", os.cpu_count() or 1))
+# Progress output is buffered and flushed every 64 files (two lines each), or at
+# least this often so the GUI and tail -f still see steady progress.
+LOG_FLUSH_LINES = 128
+LOG_FLUSH_SECONDS = 1.0
+
+
+# Height and width sit right after the magic, size and flags fields
+_HEADER_STRUCT = struct.Struct("<II")
+_HEADER_PREFIX = 20
+
+
+def read_dds_size(path: Union[str, Path]) -> tuple[int, int]:
+    # os.read on a raw fd skips the buffered file object; os.pread is not
+    # available on Windows and the fd is fresh at offset 0 anyway.
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        buf = os.read(fd, _HEADER_PREFIX)
+    finally:
+        os.close(fd)
+    if len(buf) < _HEADER_PREFIX or buf[:4] != b"DDS ":
+        raise ValueError("Not a DDS file")
+    height, width = _HEADER_STRUCT.unpack_from(buf, 12)
+    return width, height
 
 
-def read_dds_size(path: Path) -> tuple[int, int]:
-    with path.open("rb") as f:
-        if f.read(4) != b"DDS ":
-            raise ValueError("Not a DDS file")
-        header = f.read(124)
-    height = struct.unpack_from("<I", header, 8)[0]
-    width = struct.unpack_from("<I", header, 12)[0]
-    return width, height
+_NORMAL_RE = re.compile(r"_(?:n|nm|normal|norm)\.", re.IGNORECASE)
 
 
 def is_normal_map(name: str) -> bool:
-    lowered = name.lower()
-    return any(token in lowered for token in ("_n.", "_nm.", "_normal.", "_norm."))
+    return _NORMAL_RE.search(name) is not None
 
 
 def choose_scale(width: int, height: int, max_dim: int) -> int:
@@ -85,7 +145,7 @@ def choose_scale(width: int, height: int, max_dim: int) -> int:
     return 1
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Batch-process DDS files with a configurable model command.",
     )
@@ -116,6 +176,16 @@ def parse_args() -> argparse.Namespace:
             "'{output}' as placeholders. If omitted, files are copied instead."
         ),
     )
+    parser.add_argument(
+        "--model-daemon-cmd",
+        default=DEFAULT_MODEL_DAEMON_CMD,
+        help=(
+            "Command for a persistent model process. It is started once and receives one "
+            "tab-separated 'input output scale kind width height' line per file on stdin, "
+            "answering each with a status line ('ok ...' on success) on stdout. "
+            "Takes precedence over --model-cmd."
+        ),
+    )
     parser.add_argument(
         "--overwrite",
         action="store_true",
@@ -130,6 +200,21 @@ def parse_args() -> argparse.Namespace:
             " Values at or above this dimension are copied instead of upscaled."
         ),
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Number of files processed concurrently (defaults to the CPU count).",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help=(
+            "Drive model commands as asyncio subprocesses instead of worker threads. "
+            "Pair with a --jobs above the CPU count when the model is GPU bound."
+        ),
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -160,29 +245,229 @@ def parse_args() -> argparse.Namespace:
         default="Update processed DDS assets",
         help="Commit message used when --git-commit is set.",
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def discover_dds_files(root: Path) -> Iterable[Path]:
-    return root.rglob("*.dds")
+def scandir_dds(path: str) -> Iterator[os.DirEntry]:
+    """Yield ``.dds`` entries below ``path`` using the cached ``DirEntry`` type info."""
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from scandir_dds(entry.path)
+                elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(".dds"):
+                    yield entry
+    except (FileNotFoundError, PermissionError):
+        # Missing roots yield nothing, matching the old rglob behaviour
+        pass
 
 
-def run_command(command: str, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
-    return subprocess.run(
-        command,
-        shell=True,
-        check=True,
+# Output directories already created this run; the set check replaces a mkdir per file
+_MKDIR_CACHE: set[str] = set()
+
+
+def ensure_dir(path: str) -> None:
+    if path not in _MKDIR_CACHE:
+        os.makedirs(path, exist_ok=True)
+        _MKDIR_CACHE.add(path)
+
+
+def copy_file(source: str, output: str) -> None:
+    """Copy without staging the texture in a Python buffer.
+
+    ``os.copy_file_range`` lets Btrfs/XFS share extents; anything that refuses
+    it falls back to ``shutil.copyfile`` (sendfile on Linux, CopyFileW on Windows).
+    """
+    copy_range = getattr(os, "copy_file_range", None)
+    if copy_range is not None:
+        try:
+            with open(source, "rb") as src, open(output, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = copy_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(source, output)
+
+
+def split_command(command: str) -> List[str]:
+    """Tokenize a command line the way the platform shell would, without a shell."""
+    if os.name != "nt":
+        return shlex.split(command)
+    # Non-POSIX mode keeps Windows backslashes intact but leaves quotes on tokens
+    tokens = shlex.split(command, posix=False)
+    return [tok[1:-1] if len(tok) >= 2 and tok[0] == tok[-1] == '"' else tok for tok in tokens]
+
+
+# Placeholders accepted in --model-cmd, in the order CommandTemplate.render takes them
+TEMPLATE_FIELDS = ("input", "output", "scale", "kind", "width", "height")
+
+
+class CommandTemplate:
+    """A ``--model-cmd`` template tokenized and parsed once per run.
+
+    Tokens are split before substitution so paths containing spaces stay a single
+    argument. Placeholders are resolved to positions up front, which also rejects
+    unknown names before any file is processed.
+    """
+
+    def __init__(self, template: str) -> None:
+        self.template = template
+        formatter = string.Formatter()
+        self._tokens: List[Union[str, Tuple[Tuple[str, int, str], ...]]] = []
+        for token in split_command(template):
+            parts = []
+            for literal, field, spec, conversion in formatter.parse(token):
+                index = -1
+                if field is not None:
+                    if field not in TEMPLATE_FIELDS or conversion:
+                        raise ValueError(
+                            f"Unsupported placeholder '{{{field}}}' in model command; "
+                            f"use one of: {', '.join(TEMPLATE_FIELDS)}"
+                        )
+                    index = TEMPLATE_FIELDS.index(field)
+                parts.append((literal, index, spec or ""))
+            if all(index < 0 for _, index, _ in parts):
+                self._tokens.append("".join(literal for literal, _, _ in parts))
+            else:
+                self._tokens.append(tuple(parts))
+
+    def render(self, *values: object) -> List[str]:
+        argv = []
+        for token in self._tokens:
+            if isinstance(token, str):
+                argv.append(token)
+            else:
+                argv.append(
+                    "".join(
+                        literal if index < 0 else literal + format(values[index], spec)
+                        for literal, index, spec in token
+                    )
+                )
+        return argv
+
+
+# Model, daemon and git children of the current run, so a stop can terminate them
+_active: set = set()
+_active_lock = threading.Lock()
+# Set by terminate_active(); children started after a stop are terminated at once
+_stopping = threading.Event()
+
+
+def _track(proc) -> None:
+    with _active_lock:
+        _active.add(proc)
+        stopping = _stopping.is_set()
+    if stopping:
+        _terminate(proc)
+
+
+def _untrack(proc) -> None:
+    with _active_lock:
+        _active.discard(proc)
+
+
+def _terminate(proc) -> None:
+    try:
+        proc.terminate()
+    except OSError:
+        pass  # already exited
+
+
+def terminate_active() -> None:
+    """Terminate every child started by the current run (the GUI's Stop)."""
+    with _active_lock:
+        _stopping.set()
+        procs = list(_active)
+    for proc in procs:
+        _terminate(proc)
+
+
+def run_command(
+    argv: List[str],
+    env: Optional[Dict[str, str]] = None,
+    capture_stdout: bool = False,
+    cwd: Optional[str] = None,
+) -> subprocess.CompletedProcess:
+    # Model progress output is discarded unless asked for; stderr is kept (as
+    # bytes) so failures can still be reported.
+    proc = subprocess.Popen(
+        argv,
         env=env,
-        stdout=subprocess.PIPE,
+        cwd=cwd,
+        stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
         stderr=subprocess.PIPE,
-        text=True,
     )
+    _track(proc)
+    try:
+        stdout, stderr = proc.communicate()
+    finally:
+        _untrack(proc)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, argv, stdout, stderr)
+    return subprocess.CompletedProcess(argv, proc.returncode, stdout, stderr)
+
+
+class ModelDaemon:
+    """A model process started once and fed one file per stdin line."""
+
+    def __init__(self, command: str, env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None) -> None:
+        self.command = command
+        self._env = env
+        self._cwd = cwd
+        self._proc: Optional[subprocess.Popen] = None
+        # Requests and replies are paired by order, so one file is in flight at a time
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        # Started on first use so dry runs and all-copy runs never launch the model
+        if self._proc is None:
+            self._proc = subprocess.Popen(
+                split_command(self.command),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                env=self._env,
+                cwd=self._cwd,
+                text=True,
+                bufsize=1,
+            )
+            _track(self._proc)
+        return self._proc
+
+    def submit(self, *values: object) -> str:
+        line = "\t".join(str(field) for field in values) + "\n"
+        with self._lock:
+            try:
+                self._start()
+                self._proc.stdin.write(line)
+                self._proc.stdin.flush()
+                reply = self._proc.stdout.readline()
+            except (BrokenPipeError, OSError) as exc:
+                raise RuntimeError(f"model daemon is not accepting work: {exc}") from exc
+        if not reply:
+            raise RuntimeError(f"model daemon exited with code {self._proc.poll()}")
+        return reply.rstrip("\r\n")
+
+    def close(self) -> None:
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._proc.wait()
+        _untrack(self._proc)
 
 
 def process_file(
-    source: Path,
-    output: Path,
-    command_template: Optional[str],
+    source: str,
+    output: str,
+    command_template: Optional[CommandTemplate],
     dry_run: bool,
     overwrite: bool,
     width: int,
@@ -190,12 +475,38 @@ def process_file(
     scale: int,
     kind: str,
     extra_env: Optional[Dict[str, str]] = None,
+    daemon: Optional[ModelDaemon] = None,
+    existing_outputs: Optional[set[str]] = None,
+    cwd: Optional[str] = None,
 ) -> ProcessingResult:
-    output.parent.mkdir(parents=True, exist_ok=True)
-    if output.exists() and not overwrite:
+    if dry_run:
+        # Report the plan without touching the output tree at all
+        if scale == 1 or (daemon is None and command_template is None):
+            message = "copy"
+        elif daemon is not None:
+            message = f"{daemon.command} <- {source}"
+        else:
+            message = shlex.join(command_template.render(source, output, scale, kind, width, height))
+        return ProcessingResult(
+            source=source,
+            output=output,
+            status="pending",
+            width=width,
+            height=height,
+            scale=scale,
+            kind=kind,
+            message=message,
+        )
+
+    ensure_dir(os.path.dirname(output))
+    if existing_outputs is not None:
+        exists = output in existing_outputs
+    else:
+        exists = os.path.exists(output)
+    if exists and not overwrite:
         return ProcessingResult(
-            source=str(source),
-            output=str(output),
+            source=source,
+            output=output,
             status="skipped",
             width=width,
             height=height,
@@ -205,21 +516,10 @@ def process_file(
         )
 
     if scale == 1:
-        if dry_run:
-            return ProcessingResult(
-                source=str(source),
-                output=str(output),
-                status="pending",
-                width=width,
-                height=height,
-                scale=scale,
-                kind=kind,
-                message="copy",
-            )
-        output.write_bytes(source.read_bytes())
+        copy_file(source, output)
         return ProcessingResult(
-            source=str(source),
-            output=str(output),
+            source=source,
+            output=output,
             status="ok",
             width=width,
             height=height,
@@ -228,67 +528,65 @@ def process_file(
             message="copied",
         )
 
-    format_kwargs = {
-        "input": str(source),
-        "output": str(output),
-        "scale": scale,
-        "kind": kind,
-        "width": width,
-        "height": height,
-    }
+    if daemon is not None:
+        try:
+            reply = daemon.submit(source, output, scale, kind, width, height)
+        except RuntimeError as exc:
+            reply = f"error {exc}"
+        status, _, detail = reply.partition(" ")
+        return ProcessingResult(
+            source=source,
+            output=output,
+            status="ok" if status.lower() == "ok" else "error",
+            width=width,
+            height=height,
+            scale=scale,
+            kind=kind,
+            message=detail if status.lower() == "ok" else reply,
+        )
 
-    if command_template:
-        command = command_template.format(**format_kwargs)
-        if dry_run:
+    if command_template is not None:
+        argv = command_template.render(source, output, scale, kind, width, height)
+        try:
+            run_command(argv, env=extra_env, cwd=cwd)
+        except subprocess.CalledProcessError as exc:
+            stderr = (exc.stderr or b"").decode(errors="replace").strip()
             return ProcessingResult(
-                source=str(source),
-                output=str(output),
-                status="pending",
+                source=source,
+                output=output,
+                status="error",
                 width=width,
                 height=height,
                 scale=scale,
                 kind=kind,
-                message=command,
+                message=stderr or f"exit code {exc.returncode}",
             )
-        try:
-            result = run_command(command, env=extra_env)
-        except subprocess.CalledProcessError as exc:
+        except OSError as exc:
             return ProcessingResult(
-                source=str(source),
-                output=str(output),
+                source=source,
+                output=output,
                 status="error",
                 width=width,
                 height=height,
                 scale=scale,
                 kind=kind,
-                message=exc.stderr or exc.stdout,
+                message=str(exc),
             )
         return ProcessingResult(
-            source=str(source),
-            output=str(output),
+            source=source,
+            output=output,
             status="ok",
             width=width,
             height=height,
             scale=scale,
             kind=kind,
-            message=result.stdout.strip(),
+            message="processed",
         )
 
-    if dry_run:
-        return ProcessingResult(
-            source=str(source),
-            output=str(output),
-            status="pending",
-            width=width,
-            height=height,
-            scale=scale,
-            kind=kind,
-            message="copy",
-        )
-    output.write_bytes(source.read_bytes())
+    copy_file(source, output)
     return ProcessingResult(
-        source=str(source),
-        output=str(output),
+        source=source,
+        output=output,
         status="ok",
         width=width,
         height=height,
@@ -298,85 +596,286 @@ def process_file(
     )
 
 
-def write_manifest(summary: RunSummary, output_dir: Path) -> None:
-    manifest_path = output_dir / "processing_manifest.json"
-    manifest_path.write_text(
-        json.dumps(
-            {
-                "model_name": summary.model_name,
-                "model_command": summary.model_command,
-                "input_root": summary.input_root,
-                "output_root": summary.output_root,
-                "started_at": summary.started_at,
-                "finished_at": summary.finished_at,
-                "dry_run": summary.dry_run,
-                "overwrite": summary.overwrite,
-                "processed": [asdict(item) for item in summary.processed],
-            },
-            indent=2,
+def plan_tasks(input_dir: Path, output_dir: Path, max_dim: int, copy_only: bool = False) -> Iterator[FileTask]:
+    """Walk the tree and size each file in the same pass.
+
+    Normal maps and copy-only runs always end up at scale 1, so their headers
+    are not read and the manifest records them as 0x0.
+    """
+    input_root = str(input_dir)
+    output_root = str(output_dir)
+    # Plain string slicing and joins; pathlib arithmetic per file adds up on big trees
+    prefix_len = len(os.path.join(input_root, ""))
+    for entry in scandir_dds(input_root):
+        source = entry.path
+        rel = source[prefix_len:]
+        kind = "normal" if is_normal_map(entry.name) else "color"
+        if kind == "normal" or copy_only:
+            width = height = 0
+            scale = 1
+        else:
+            try:
+                width, height = read_dds_size(source)
+            except Exception:
+                width, height = 0, 0
+            scale = choose_scale(width, height, max_dim)
+        yield FileTask(
+            source=source,
+            output=os.path.join(output_root, rel),
+            rel=rel,
+            width=width,
+            height=height,
+            kind=kind,
+            scale=scale,
         )
+
+
+def _model_env(task: FileTask, options: ProcessingOptions) -> Optional[Dict[str, str]]:
+    # Only a real --model-cmd spawn needs the environment; copies and dry runs skip it
+    if options.command_template is None or options.daemon is not None or task.scale == 1 or options.dry_run:
+        return None
+    return {
+        **options.base_env,
+        "DDS_KIND": task.kind,
+        "DDS_SCALE": str(task.scale),
+        "DDS_WIDTH": str(task.width),
+        "DDS_HEIGHT": str(task.height),
+    }
+
+
+def _process_one(task: FileTask, options: ProcessingOptions) -> ProcessingResult:
+    return process_file(
+        source=task.source,
+        output=task.output,
+        command_template=options.command_template,
+        dry_run=options.dry_run,
+        overwrite=options.overwrite,
+        width=task.width,
+        height=task.height,
+        scale=task.scale,
+        kind=task.kind,
+        extra_env=_model_env(task, options),
+        daemon=options.daemon,
+        existing_outputs=options.existing_outputs,
+        cwd=options.cwd,
     )
 
 
-def commit_and_push(output_dir: Path, message: str, remote: str, branch: str, push: bool) -> None:
-    run_command(f"git add {shlex.quote(str(output_dir))}")
-    run_command(f"git commit -m {shlex.quote(message)}")
-    if push:
-        run_command(f"git push {shlex.quote(remote)} {shlex.quote(branch)}")
+def _task_result(task: FileTask, status: str, message: str) -> ProcessingResult:
+    return ProcessingResult(
+        source=task.source,
+        output=task.output,
+        status=status,
+        width=task.width,
+        height=task.height,
+        scale=task.scale,
+        kind=task.kind,
+        message=message,
+    )
 
 
-def main() -> int:
-    args = parse_args()
-    input_dir = args.input_dir.resolve()
-    output_dir = args.output_dir.resolve()
-    command_template = args.model_cmd
+async def _process_one_async(
+    task: FileTask,
+    options: ProcessingOptions,
+    limit: asyncio.Semaphore,
+) -> ProcessingResult:
+    async with limit:
+        env = _model_env(task, options)
+        if env is None:
+            # Copies, dry runs and daemon requests take the regular blocking path
+            return await asyncio.to_thread(_process_one, task, options)
+        if options.existing_outputs is not None:
+            exists = task.output in options.existing_outputs
+        else:
+            exists = os.path.exists(task.output)
+        if exists and not options.overwrite:
+            return _task_result(task, "skipped", "Output exists; use --overwrite to reprocess")
+
+        ensure_dir(os.path.dirname(task.output))
+        argv = options.command_template.render(
+            task.source, task.output, task.scale, task.kind, task.width, task.height
+        )
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                env=env,
+                cwd=options.cwd,
+            )
+        except OSError as exc:
+            return _task_result(task, "error", str(exc))
+        _track(proc)
+        try:
+            _, stderr = await proc.communicate()
+        finally:
+            _untrack(proc)
+        if proc.returncode:
+            stderr_text = stderr.decode(errors="replace").strip()
+            return _task_result(task, "error", stderr_text or f"exit code {proc.returncode}")
+        return _task_result(task, "ok", "processed")
+
+
+def iter_async_results(
+    tasks: List[FileTask],
+    options: ProcessingOptions,
+    jobs: int,
+) -> Iterator[ProcessingResult]:
+    """Run every task on a private event loop and yield results in task order.
+
+    Waiting on one task keeps the loop turning, so up to ``jobs`` model
+    processes stay in flight while results are consumed one by one.
+    """
+    loop = asyncio.new_event_loop()
+    limit = asyncio.Semaphore(jobs)
+    pending = [loop.create_task(_process_one_async(task, options, limit)) for task in tasks]
+    try:
+        for future in pending:
+            yield loop.run_until_complete(future)
+    finally:
+        for future in pending:
+            future.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
+def utc_timestamp() -> str:
+    # Same shape as the old utcnow().isoformat() + "Z", without the deprecated call
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
-    dds_files = list(discover_dds_files(input_dir))
-    results: List[ProcessingResult] = []
-    base_env = os.environ.copy()
 
-    start = datetime.utcnow().isoformat() + "Z"
-    for idx, source in enumerate(dds_files, 1):
-        rel = source.relative_to(input_dir)
-        output = output_dir / rel
+def write_manifest(summary: RunSummary, output_dir: Path) -> None:
+    manifest_path = output_dir / "processing_manifest.json"
+    payload = {
+        "model_name": summary.model_name,
+        "model_command": summary.model_command,
+        "input_root": summary.input_root,
+        "output_root": summary.output_root,
+        "started_at": summary.started_at,
+        "finished_at": summary.finished_at,
+        "dry_run": summary.dry_run,
+        "overwrite": summary.overwrite,
+        "processed": summary.processed,
+    }
+    if orjson is not None:
+        # orjson serializes the result dataclasses natively, no asdict() copy
         try:
-            width, height = read_dds_size(source)
-        except Exception:
-            width, height = 0, 0
-        kind = "normal" if is_normal_map(source.name) else "color"
-        scale = 1 if kind == "normal" else choose_scale(width, height, args.max_dim)
-        print(
-            f"[{idx}/{len(dds_files)}] {rel} -> {width}x{height} "
-            f"kind={kind} scale=x{scale}"
-        )
-        env = base_env.copy()
-        env.update(
-            {
-                "DDS_KIND": kind,
-                "DDS_SCALE": str(scale),
-                "DDS_WIDTH": str(width),
-                "DDS_HEIGHT": str(height),
-            }
-        )
-        result = process_file(
-            source=source,
-            output=output,
-            command_template=command_template,
-            dry_run=args.dry_run,
-            overwrite=args.overwrite,
-            width=width,
-            height=height,
-            scale=scale,
-            kind=kind,
-            extra_env=env,
-        )
-        results.append(result)
-        print(f"  status={result.status} message={result.message or ''}\n")
+            manifest_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+            return
+        except TypeError:
+            # Surrogate-escaped (undecodable) filenames are rejected; json escapes them
+            pass
+    # ProcessingResult is flat, so a field-name lookup avoids asdict()'s deep copy
+    payload["processed"] = [{name: getattr(item, name) for name in _RESULT_FIELDS} for item in summary.processed]
+    with manifest_path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def commit_and_push(
+    output_dir: Path, message: str, remote: str, branch: str, push: bool, cwd: Optional[str] = None
+) -> None:
+    run_command(["git", "add", str(output_dir)], cwd=cwd)
+    run_command(["git", "commit", "-m", message], cwd=cwd)
+    if push:
+        run_command(["git", "push", remote, branch], cwd=cwd)
+
+
+def _flush_log(lines: List[str]) -> None:
+    # One write per batch instead of a console write per print(); matters most
+    # for the Windows console and redirected output of the packaged exe.
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        lines.clear()
+
+
+def main(
+    argv: Optional[List[str]] = None,
+    stop_event: Optional[threading.Event] = None,
+    cwd: Optional[str] = None,
+) -> int:
+    """Run the CLI.
+
+    ``stop_event`` lets an embedding caller (the GUI) cancel queued files, and
+    ``terminate_active()`` kills the children already running. ``cwd`` is the
+    directory relative paths, model commands and git run in (default: the
+    current one) without a process-wide chdir.
+    """
+    args = parse_args(argv)
+    # The cache is per run; an in-process caller may have deleted outputs since the last one
+    _MKDIR_CACHE.clear()
+    _stopping.clear()
+    base = Path(cwd) if cwd else Path()
+    input_dir = (base / args.input_dir).resolve()
+    output_dir = (base / args.output_dir).resolve()
+    command_template = args.model_cmd
+    try:
+        template = CommandTemplate(command_template) if command_template else None
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    # Materialized so the progress lines know the total up front
+    copy_only = not (command_template or args.model_daemon_cmd)
+    tasks = list(plan_tasks(input_dir, output_dir, args.max_dim, copy_only=copy_only))
+    options = ProcessingOptions(
+        command_template=template,
+        dry_run=args.dry_run,
+        overwrite=args.overwrite,
+        base_env=os.environ.copy(),
+        cwd=cwd,
+    )
+    if not args.overwrite and not args.dry_run:
+        # One walk of the output tree replaces a stat per file on re-runs
+        options.existing_outputs = {entry.path for entry in scandir_dds(str(output_dir))}
+    if args.model_daemon_cmd:
+        options.daemon = ModelDaemon(args.model_daemon_cmd, env=options.base_env, cwd=cwd)
+
+    start = utc_timestamp()
+    if not args.dry_run:
+        # Create the mirrored tree once up front so workers only hit the cache
+        for parent in {os.path.dirname(task.output) for task in tasks}:
+            ensure_dir(parent)
 
-    finish = datetime.utcnow().isoformat() + "Z"
+    results: List[ProcessingResult] = []
+    log_buf: List[str] = []
+    last_flush = time.monotonic()
+    jobs = max(1, args.jobs)
+    try:
+        with contextlib.ExitStack() as stack:
+            if args.use_async:
+                outcomes = stack.enter_context(contextlib.closing(iter_async_results(tasks, options, jobs)))
+            else:
+                # Files are independent and the heavy lifting happens in child processes,
+                # so threads are enough to keep several model invocations in flight.
+                pool = stack.enter_context(ThreadPoolExecutor(max_workers=jobs))
+                outcomes = pool.map(partial(_process_one, options=options), tasks)
+            # Both paths yield in submission order, so the log and manifest keep file order
+            for idx, (task, result) in enumerate(zip(tasks, outcomes), 1):
+                log_buf.append(
+                    f"[{idx}/{len(tasks)}] {task.rel} -> {result.width}x{result.height} "
+                    f"kind={result.kind} scale=x{result.scale}"
+                )
+                log_buf.append(f"  status={result.status} message={result.message or ''}\n")
+                results.append(result)
+                if len(log_buf) >= LOG_FLUSH_LINES or time.monotonic() - last_flush >= LOG_FLUSH_SECONDS:
+                    _flush_log(log_buf)
+                    last_flush = time.monotonic()
+                if stop_event is not None and stop_event.is_set():
+                    # Closing the result iterator cancels everything not yet started
+                    outcomes.close()
+                    log_buf.append(f"Stopped after {idx} of {len(tasks)} files.")
+                    break
+    finally:
+        _flush_log(log_buf)
+        if options.daemon is not None:
+            options.daemon.close()
+
+    finish = utc_timestamp()
     summary = RunSummary(
         model_name=args.model_name,
-        model_command=command_template,
+        model_command=args.model_daemon_cmd or command_template,
         input_root=str(input_dir),
         output_root=str(output_dir),
         processed=results,
@@ -389,6 +888,9 @@ def main() -> int:
     output_dir.mkdir(parents=True, exist_ok=True)
     write_manifest(summary, output_dir)
 
+    if len(results) < len(tasks):
+        return 130
+
     if args.git_push:
         args.git_commit = True
     if args.git_commit:
@@ -398,6 +900,7 @@ def main() -> int:
             remote=args.git_remote,
             branch=args.git_branch,
             push=args.git_push,
+            cwd=cwd,
         )
 
     return 0
@@ -2,8 +2,9 @@
 """
 Create a standalone Windows executable for the batch DDS processor.
 
-This helper wraps PyInstaller so the main script can be shipped as a single
-.exe without requiring Python to be preinstalled.
+This helper wraps PyInstaller so the main script can be shipped as an .exe
+without requiring Python to be preinstalled. By default it produces a folder
+build (fast startup); pass --onefile for a single self-extracting .exe.
 
 Run on Windows with Python 3.10+ and PyInstaller installed.
 """
@@ -11,6 +12,7 @@ Run on Windows with Python 3.10+ and PyInstaller installed.
 from __future__ import annotations
 
 import argparse
+import importlib.util
 import shutil
 import subprocess
 import sys
@@ -21,10 +23,16 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 
+PYINSTALLER_MISSING = (
+    "PyInstaller is required to build the executable.\n"
+    "Install it with:\n\n"
+    "    pip install pyinstaller\n"
+)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Package batch_process_dds.py into a single-file Windows executable.",
+        description="Package batch_process_dds.py into a Windows executable.",
     )
 
     parser.add_argument(
@@ -47,6 +55,21 @@ def parse_args() -> argparse.Namespace:
         help="Name of the output executable (without extension).",
     )
 
+    parser.add_argument(
+        "--onefile",
+        action="store_true",
+        help="Build a single self-extracting .exe instead of a folder. Easier to "
+             "copy around, but every launch unpacks the bundle to %%TEMP%% first, "
+             "which adds noticeable startup time to scripted batch runs.",
+    )
+
+    parser.add_argument(
+        "--upx-dir",
+        type=Path,
+        help="Directory containing upx.exe; when set, bundled binaries are "
+             "UPX-compressed to shrink the distribution.",
+    )
+
     parser.add_argument(
         "--script",
         default=SCRIPT_DIR / "batch_process_dds.py",
@@ -58,6 +81,12 @@ def parse_args() -> argparse.Namespace:
 
 
 def ensure_pyinstaller_available(python: str) -> None:
+    if python == sys.executable:
+        # Same interpreter: an import lookup is enough, no need to start another Python
+        if importlib.util.find_spec("PyInstaller") is None:
+            raise RuntimeError(PYINSTALLER_MISSING)
+        return
+
     if shutil.which(python) is None:
         raise RuntimeError(f"Python interpreter not found: {python}")
 
@@ -70,11 +99,7 @@ def ensure_pyinstaller_available(python: str) -> None:
             text=True,
         )
     except (subprocess.CalledProcessError, FileNotFoundError) as exc:
-        raise RuntimeError(
-            "PyInstaller is required to build the executable.\n"
-            "Install it with:\n\n"
-            "    pip install pyinstaller\n"
-        ) from exc
+        raise RuntimeError(PYINSTALLER_MISSING) from exc
 
 
 def build_executable(args: argparse.Namespace) -> Path:
@@ -92,13 +117,16 @@ def build_executable(args: argparse.Namespace) -> Path:
     command = [
         args.python,
         "-m", "PyInstaller",
-        "--onefile",
+        "--onefile" if args.onefile else "--onedir",
         "--clean",
         "--noconfirm",
+        "--log-level", "WARN",
         "--name", args.name,
         "--distpath", str(args.dist_dir),
-        str(script_path),
     ]
+    if args.upx_dir is not None:
+        command += ["--upx-dir", str(args.upx_dir)]
+    command.append(str(script_path))
 
     try:
         result = subprocess.run(
@@ -113,7 +141,9 @@ def build_executable(args: argparse.Namespace) -> Path:
         print(exc.stderr, file=sys.stderr)
         raise
 
-    return args.dist_dir / f"{args.name}.exe"
+    if args.onefile:
+        return args.dist_dir / f"{args.name}.exe"
+    return args.dist_dir / args.name / f"{args.name}.exe"
 
 
 def main() -> int:
@@ -1,20 +1,26 @@
 """Lightweight Tkinter GUI wrapper for batch_process_dds.
 
 The GUI exposes common inputs for batch processing DDS files and delegates the
-actual work to ``scripts/batch_process_dds.py`` to preserve manifest generation
-and processing semantics. Use this as a convenience layer when launching the
-CLI locally.
+actual work to ``batch_process_dds.main`` (run in-process on a worker thread) to
+preserve manifest generation and processing semantics. Use this as a
+convenience layer when launching the CLI locally.
 """
 from __future__ import annotations
 
+import contextlib
+import functools
+import io
 import json
 import os
-import subprocess
+import queue
+import re
+import stat
 import sys
 import threading
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
@@ -24,8 +30,81 @@ if str(SCRIPT_DIR) not in sys.path:
 
 import batch_process_dds  # noqa: E402
 
+try:
+    import ijson
+except ImportError:  # optional: the manifest is parsed in one go with json instead
+    ijson = None
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson is not installed
+    orjson = None
+
+MANIFEST_PARSE_ERRORS: Tuple[type, ...] = (ijson.JSONError,) if ijson is not None else ()
+
+
+def _json_loads(data: bytes):
+    # Both parsers accept raw bytes, so the manifest never needs a separate text decode
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. the \udcxx escapes json writes for undecodable filenames
+    return json.loads(data)
+
+
+# How often queued log lines are flushed into the log widget
+LOG_POLL_MS = 50
+# Older lines are dropped from the log widget beyond this many
+LOG_MAX_LINES = 2000
+# Indeterminate progress animation step; slower ticks look the same but cost less
+PROGRESS_STEP_MS = 50
+# Quiet period after the last edit of the input path before recounting
+REFRESH_DEBOUNCE_MS = 400
+# Per-file "[i/N] ..." lines from batch_process_dds, after the log timestamp
+PROGRESS_RE = re.compile(r"\[[\d:]+\] \[(\d+)/(\d+)\] ")
+
+
+class _QueueWriter(io.TextIOBase):
+    """Text sink that hands each complete line written to it to ``emit``."""
+
+    def __init__(self, emit) -> None:
+        super().__init__()
+        self._emit = emit
+        self._pending = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        *lines, self._pending = (self._pending + text).split("\n")
+        for line in lines:
+            self._emit(line.rstrip())
+        return len(text)
+
+    def flush_pending(self) -> None:
+        if self._pending:
+            self._emit(self._pending.rstrip())
+            self._pending = ""
+
+
+def _iter_dds_scandir(root: str) -> Iterator[str]:
+    """Yield ``.dds`` file paths below ``root`` without building a Path per entry.
+
+    Walks with ``batch_process_dds.scandir_dds`` itself, so the count always
+    matches what a run will process.
+    """
+    return (entry.path for entry in batch_process_dds.scandir_dds(root))
+
+
+def _fast_count_dds(root: str) -> int:
+    return sum(1 for _ in _iter_dds_scandir(root))
+
+
+@functools.lru_cache(maxsize=128)
 def format_path(value: str) -> str:
+    # resolve() hits the filesystem (slow on network drives); the same text maps
+    # to the same path for the life of the window
     return str(Path(value).expanduser().resolve())
 
 
@@ -51,6 +130,7 @@ class BatchGUI(tk.Tk):
         self.output_var = tk.StringVar(value=format_path(batch_process_dds.DEFAULT_OUTPUT_DIR))
         self.overwrite_var = tk.BooleanVar(value=False)
         self.dry_run_var = tk.BooleanVar(value=False)
+        self.workers_var = tk.IntVar(value=batch_process_dds.DEFAULT_JOBS)
 
         self.git_commit_var = tk.BooleanVar(value=False)
         self.git_push_var = tk.BooleanVar(value=False)
@@ -61,14 +141,28 @@ class BatchGUI(tk.Tk):
         self.file_count_var = tk.StringVar(value="Discovered files: 0")
         self.status_var = tk.StringVar(value="Idle")
         self.progress_var = tk.DoubleVar(value=0)
+        self._log_queue: queue.Queue[str] = queue.Queue()
+        # input dir -> (mtime_ns, .dds count) from the last walk
+        self._discovery_cache: Dict[Path, Tuple[int, int]] = {}
+        # Bumped per walk; results from an older walk are dropped when they arrive
+        self._count_generation = 0
+        self._refresh_after_id: Optional[str] = None
 
         self._build_layout()
         self._update_file_count()
+        self.input_var.trace_add("write", self._schedule_refresh)
+        # No point animating a minimized window
+        self.bind("<Unmap>", self._pause_animation)
+        self.bind("<Map>", self._resume_animation)
 
+        # Runs call batch_process_dds.main on this thread; Tk only ever sees
+        # results through the log queue and after() callbacks.
         self.process_thread: Optional[threading.Thread] = None
-        self.current_process: Optional[subprocess.Popen[str]] = None
+        self._stop_event = threading.Event()
         self.stop_requested = False
         self._set_status("Idle", color=self.muted_text)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(LOG_POLL_MS, self._drain_log_queue)
 
     def _configure_styles(self) -> None:
         style = ttk.Style(self)
@@ -98,44 +192,56 @@ class BatchGUI(tk.Tk):
 
     def _build_layout(self) -> None:
         container = ttk.Frame(self, padding=16, style="App.TFrame")
-        container.pack(fill=tk.BOTH, expand=True)
 
+        # Each section is filled in before it is packed, so the geometry manager
+        # lays it out once instead of after every child.
         header = ttk.Frame(container, style="App.TFrame")
-        header.pack(fill=tk.X, pady=(0, 10))
         ttk.Label(header, text="DDS Batch Processor", style="App.Heading.TLabel").pack(anchor=tk.W)
         ttk.Label(
             header,
             text="Configure inputs, choose your model, and run processing with a single click.",
             style="App.Subheading.TLabel",
         ).pack(anchor=tk.W)
+        header.pack(fill=tk.X, pady=(0, 10))
 
         # Paths
         paths_frame = ttk.LabelFrame(container, text="Paths", style="App.TLabelframe", padding=10)
-        paths_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
-
-        self._add_entry_with_button(
-            paths_frame, "Input directory", self.input_var, lambda: self._choose_dir(self.input_var)
-        )
-        self._add_entry_with_button(
-            paths_frame, "Output directory", self.output_var, lambda: self._choose_dir(self.output_var)
+        self._add_entry_rows(
+            paths_frame,
+            [
+                ("Input directory", self.input_var, lambda: self._choose_dir(self.input_var)),
+                ("Output directory", self.output_var, lambda: self._choose_dir(self.output_var)),
+            ],
         )
+        paths_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         # Model configuration
         model_frame = ttk.LabelFrame(container, text="Model", style="App.TLabelframe", padding=10)
+        self._add_entry_rows(
+            model_frame,
+            [
+                ("Model name", self.model_name_var, None),
+                ("Model command", self.model_cmd_var, None),
+            ],
+        )
         model_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
-        self._add_labeled_entry(model_frame, "Model name", self.model_name_var)
-        self._add_labeled_entry(model_frame, "Model command", self.model_cmd_var)
-
         # Flags
         flags_frame = ttk.Frame(container, style="App.TFrame")
-        flags_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
         ttk.Checkbutton(flags_frame, text="Overwrite", variable=self.overwrite_var).pack(side=tk.LEFT, padx=4)
         ttk.Checkbutton(flags_frame, text="Dry run", variable=self.dry_run_var).pack(side=tk.LEFT, padx=4)
+        ttk.Label(flags_frame, text="Workers", style="App.TLabel").pack(side=tk.LEFT, padx=(12, 4))
+        ttk.Spinbox(
+            flags_frame,
+            from_=1,
+            to=max(64, 4 * (os.cpu_count() or 1)),
+            width=5,
+            textvariable=self.workers_var,
+        ).pack(side=tk.LEFT)
+        flags_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         # Git options
         git_frame = ttk.LabelFrame(container, text="Git options", style="App.TLabelframe", padding=10)
-        git_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         ttk.Checkbutton(git_frame, text="Commit results", variable=self.git_commit_var).grid(row=0, column=0, sticky=tk.W)
         ttk.Checkbutton(git_frame, text="Push after commit", variable=self.git_push_var).grid(row=0, column=1, sticky=tk.W)
@@ -143,21 +249,24 @@ class BatchGUI(tk.Tk):
         self._add_grid_entry(git_frame, "Remote", self.git_remote_var, row=1, column=0)
         self._add_grid_entry(git_frame, "Branch", self.git_branch_var, row=1, column=1)
         self._add_grid_entry(git_frame, "Commit message", self.commit_message_var, row=2, column=0, columnspan=2)
+        git_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         # Status and controls
         status_frame = ttk.Frame(container, style="App.TFrame")
-        status_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         ttk.Label(status_frame, textvariable=self.file_count_var, style="App.TLabel").pack(side=tk.LEFT)
-        ttk.Button(status_frame, text="Refresh count", command=self._update_file_count, style="App.TButton").pack(
-            side=tk.LEFT, padx=6
-        )
+        ttk.Button(
+            status_frame,
+            text="Refresh count",
+            command=lambda: self._update_file_count(force=True),
+            style="App.TButton",
+        ).pack(side=tk.LEFT, padx=6)
         self.status_label = ttk.Label(status_frame, textvariable=self.status_var, style="App.TLabel")
         self.status_label.pack(side=tk.RIGHT)
+        status_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         # Progress bar
         progress_frame = ttk.Frame(container, style="App.TFrame")
-        progress_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
         self.progress = ttk.Progressbar(
             progress_frame,
             variable=self.progress_var,
@@ -166,10 +275,10 @@ class BatchGUI(tk.Tk):
             style="Accent.Horizontal.TProgressbar",
         )
         self.progress.pack(fill=tk.X, expand=True)
+        progress_frame.pack(fill=tk.X, expand=False, pady=(0, 10))
 
         # Log output
         log_frame = ttk.LabelFrame(container, text="Logs", style="App.TLabelframe", padding=10)
-        log_frame.pack(fill=tk.BOTH, expand=True)
 
         self.log_widget = scrolledtext.ScrolledText(
             log_frame,
@@ -181,10 +290,10 @@ class BatchGUI(tk.Tk):
             insertbackground=self.accent_color,
         )
         self.log_widget.pack(fill=tk.BOTH, expand=True)
+        log_frame.pack(fill=tk.BOTH, expand=True)
 
         # Run controls
         controls = ttk.Frame(container, style="App.TFrame")
-        controls.pack(fill=tk.X, pady=(10, 0))
 
         self.start_button = ttk.Button(
             controls,
@@ -202,20 +311,23 @@ class BatchGUI(tk.Tk):
             state=tk.DISABLED,
         )
         self.stop_button.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        controls.pack(fill=tk.X, pady=(10, 0))
+        container.pack(fill=tk.BOTH, expand=True)
 
-    def _add_entry_with_button(self, frame: ttk.Frame, label: str, variable: tk.StringVar, callback) -> None:
-        row = ttk.Frame(frame)
-        row.pack(fill=tk.X, pady=3)
-        ttk.Label(row, text=label, width=16, style="App.TLabel").pack(side=tk.LEFT)
-        entry = ttk.Entry(row, textvariable=variable)
-        entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        ttk.Button(row, text="Browse", command=callback, style="App.TButton").pack(side=tk.LEFT, padx=4)
-
-    def _add_labeled_entry(self, frame: ttk.Frame, label: str, variable: tk.StringVar) -> None:
-        row = ttk.Frame(frame)
-        row.pack(fill=tk.X, pady=3)
-        ttk.Label(row, text=label, width=16, style="App.TLabel").pack(side=tk.LEFT)
-        ttk.Entry(row, textvariable=variable).pack(side=tk.LEFT, fill=tk.X, expand=True)
+    def _add_entry_rows(
+        self,
+        frame: ttk.Frame,
+        rows: List[Tuple[str, tk.StringVar, Optional[Callable[[], None]]]],
+    ) -> None:
+        """Grid ``(label, variable, browse_callback)`` rows straight into ``frame``."""
+        for index, (label, variable, browse) in enumerate(rows):
+            ttk.Label(frame, text=label, width=16, style="App.TLabel").grid(row=index, column=0, sticky=tk.W, pady=3)
+            ttk.Entry(frame, textvariable=variable).grid(row=index, column=1, sticky=tk.EW, pady=3)
+            if browse is not None:
+                ttk.Button(frame, text="Browse", command=browse, style="App.TButton").grid(
+                    row=index, column=2, padx=4, pady=3
+                )
+        frame.columnconfigure(1, weight=1)
 
     def _add_grid_entry(
         self,
@@ -236,22 +348,99 @@ class BatchGUI(tk.Tk):
         if selected:
             variable.set(format_path(selected))
             if variable is self.input_var:
-                self._update_file_count()
+                # set() just queued a debounced recount; count once, right away
+                if self._refresh_after_id is not None:
+                    self.after_cancel(self._refresh_after_id)
+                    self._refresh_after_id = None
+                self._update_file_count(force=True)
+
+    def _schedule_refresh(self, *_args: object) -> None:
+        # Recount once typing pauses instead of walking the tree on every keystroke
+        if self._refresh_after_id is not None:
+            self.after_cancel(self._refresh_after_id)
+        self._refresh_after_id = self.after(REFRESH_DEBOUNCE_MS, self._debounced_refresh)
+
+    def _debounced_refresh(self) -> None:
+        self._refresh_after_id = None
+        self._update_file_count()
 
-    def _update_file_count(self) -> None:
-        input_dir = Path(self.input_var.get())
-        if not input_dir.exists():
+    def _update_file_count(self, force: bool = False) -> None:
+        text = self.input_var.get().strip()
+        if not text:
+            self._count_generation += 1
+            self.file_count_var.set("Discovered files: 0")
+            return
+        input_dir = Path(text)
+        try:
+            st = input_dir.stat()
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            self._count_generation += 1
             self.file_count_var.set("Discovered files: 0 (input missing)")
             return
-        count = sum(1 for _ in batch_process_dds.discover_dds_files(input_dir))
-        self.file_count_var.set(f"Discovered files: {count}")
+        if input_dir == Path(input_dir.anchor):
+            # "/" or "C:\" while a path is being typed; walking a whole drive is never wanted
+            self._count_generation += 1
+            self.file_count_var.set("Discovered files: not counted for a drive root")
+            return
+        mtime_ns = st.st_mtime_ns
+        # The root mtime misses changes in nested folders, so Refresh always re-walks
+        cached = self._discovery_cache.get(input_dir)
+        # Any walk still running is superseded; its result is dropped in _count_done
+        self._count_generation += 1
+        if not force and cached is not None and cached[0] == mtime_ns:
+            self.file_count_var.set(f"Discovered files: {cached[1]}")
+            return
+        self.file_count_var.set("Discovered files: counting...")
+        threading.Thread(
+            target=self._count_worker, args=(input_dir, mtime_ns, self._count_generation), daemon=True
+        ).start()
+
+    def _count_worker(self, input_dir: Path, mtime_ns: int, generation: int) -> None:
+        count: Optional[int]
+        try:
+            count = _fast_count_dds(str(input_dir))
+        except OSError:
+            # e.g. a dropped network share; _count_done must still run to clear "counting..."
+            count = None
+        self.after(0, lambda: self._count_done(input_dir, mtime_ns, count, generation))
+
+    def _count_done(self, input_dir: Path, mtime_ns: int, count: Optional[int], generation: int) -> None:
+        if count is not None:
+            # Still a valid count for that folder, even if the input has moved on since
+            self._discovery_cache[input_dir] = (mtime_ns, count)
+        if generation != self._count_generation:
+            return
+        if count is None:
+            self.file_count_var.set("Discovered files: 0 (input unreadable)")
+        else:
+            self.file_count_var.set(f"Discovered files: {count}")
 
     def log(self, message: str) -> None:
-        self.log_widget.configure(state=tk.NORMAL)
+        # Safe from any thread; the Tk side picks lines up in _drain_log_queue
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_widget.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_widget.see(tk.END)
-        self.log_widget.configure(state=tk.DISABLED)
+        self._log_queue.put(f"[{timestamp}] {message}")
+
+    def _drain_log_queue(self) -> None:
+        lines = []
+        while True:
+            try:
+                lines.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            # One insert per tick instead of one event-loop round trip per line
+            self.log_widget.configure(state=tk.NORMAL)
+            self.log_widget.insert(tk.END, "\n".join(lines) + "\n")
+            # The text ends with a newline, so the last index sits on an empty line
+            excess = int(self.log_widget.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_widget.delete("1.0", f"{excess + 1}.0")
+            self.log_widget.see(tk.END)
+            self.log_widget.configure(state=tk.DISABLED)
+            self._update_progress_from(lines)
+        self.after(LOG_POLL_MS, self._drain_log_queue)
 
     def start_processing(self) -> None:
         if self.process_thread and self.process_thread.is_alive():
@@ -261,7 +450,6 @@ class BatchGUI(tk.Tk):
         self.stop_requested = False
 
         input_dir = Path(self.input_var.get())
-        output_dir = Path(self.output_var.get())
         if not input_dir.exists():
             messagebox.showerror("Input missing", "The selected input directory does not exist.")
             return
@@ -269,78 +457,101 @@ class BatchGUI(tk.Tk):
         self._set_status("Running...", color=self.accent_color)
         self.progress_var.set(0)
         self.progress.configure(mode="indeterminate")
-        self.progress.start(10)
-        self.log("Starting batch_process_dds.py...")
+        self.progress.start(PROGRESS_STEP_MS)
+        self.log("Starting batch_process_dds...")
 
         self.start_button.state(["disabled"])
         self.stop_button.state(["!disabled"])
 
-        self.process_thread = threading.Thread(target=self._run_subprocess, daemon=True)
+        # Read the Tk variables here; the worker thread must not touch them
+        argv = self._build_argv()
+        output_dir = Path(format_path(self.output_var.get()))
+        self._stop_event = threading.Event()
+        self.process_thread = threading.Thread(target=self._run_inproc, args=(argv, output_dir), daemon=True)
         self.process_thread.start()
 
     def stop_processing(self) -> None:
-        if not self.current_process or self.current_process.poll() is not None:
+        if not self.process_thread or not self.process_thread.is_alive():
             return
         self.stop_requested = True
-        self.log("Stopping batch_process_dds.py...")
+        self.log("Stopping batch_process_dds...")
         self._set_status("Stopping...", color=self.accent_color)
-        try:
-            self.current_process.terminate()
-        except OSError as exc:
-            self.log(f"Failed to stop process: {exc}")
+        self._stop_event.set()
+        # The event only cancels queued files; running model/git children are killed here
+        batch_process_dds.terminate_active()
 
-    def _run_subprocess(self) -> None:
-        command = self._build_command()
-        self.log("Command: " + " ".join(command))
+    def _on_close(self) -> None:
+        # The run thread is a daemon and dies with the window; do not orphan its children
+        if self.process_thread and self.process_thread.is_alive():
+            self._stop_event.set()
+            batch_process_dds.terminate_active()
+        self.destroy()
+
+    def _run_inproc(self, argv: list[str], output_dir: Path) -> None:
+        # In-process: no interpreter start-up or stdout pipe per run. redirect_stdout
+        # is process-wide, which is fine as the CLI is the only writer while it runs.
+        self.log("Arguments: " + " ".join(argv))
+        writer = _QueueWriter(self.log)
+        error: Optional[str] = None
+        manifest_summary: Optional[str] = None
         try:
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                cwd=str(SCRIPT_DIR.parent),
-                env=os.environ.copy(),
-            )
-            self.current_process = process
-        except OSError as exc:
-            self.after(0, lambda: self._finish_run(error=str(exc)))
-            return
-
-        if process.stdout:
-            for line in process.stdout:
-                self.after(0, lambda msg=line.rstrip(): self.log(msg))
-
-        process.wait()
-        manifest_summary = self._read_manifest()
+            previous_mtime = self._manifest_mtime(output_dir)
+            with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+                # Model commands and git run from the repository root, as the CLI subprocess did
+                returncode = batch_process_dds.main(argv, stop_event=self._stop_event, cwd=str(SCRIPT_DIR.parent))
+            manifest_summary = self._read_manifest(output_dir, previous_mtime)
+        except SystemExit as exc:
+            # argparse reports bad arguments by exiting
+            returncode = exc.code if isinstance(exc.code, int) else 1
+        except Exception as exc:  # keep the GUI alive whatever the run raises
+            returncode = 1
+            error = f"Processing failed: {exc}"
+        finally:
+            writer.flush_pending()
         if self.stop_requested:
-            self.after(0, lambda: self._finish_run(error="Processing stopped by user."))
-        elif process.returncode == 0:
+            self.after(0, lambda: self._finish_run(summary=manifest_summary, error="Processing stopped by user."))
+        elif error:
+            self.after(0, lambda: self._finish_run(error=error))
+        elif returncode == 0:
             self.after(0, lambda: self._finish_run(summary=manifest_summary))
         else:
-            self.after(0, lambda: self._finish_run(error=f"Process exited with code {process.returncode}"))
+            self.after(0, lambda: self._finish_run(error=f"Processing exited with code {returncode}"))
 
-    def _read_manifest(self) -> Optional[str]:
-        output_dir = Path(self.output_var.get())
-        manifest = output_dir / "processing_manifest.json"
-        if not manifest.exists():
+    @staticmethod
+    def _manifest_mtime(output_dir: Path) -> Optional[int]:
+        try:
+            return (output_dir / "processing_manifest.json").stat().st_mtime_ns
+        except OSError:
             return None
+
+    def _read_manifest(self, output_dir: Path, previous_mtime: Optional[int]) -> Optional[str]:
+        # Compared with the mtime seen before the run rather than the wall clock,
+        # which coarse filesystem timestamps can trail. An unchanged manifest is
+        # left over from an earlier run.
+        mtime = self._manifest_mtime(output_dir)
+        if mtime is None or mtime == previous_mtime:
+            return None
+        manifest = output_dir / "processing_manifest.json"
         try:
-            data = json.loads(manifest.read_text())
-        except (OSError, json.JSONDecodeError):
+            statuses = Counter(item.get("status", "unknown") for item in self._iter_manifest_items(manifest))
+        except (OSError, ValueError) + MANIFEST_PARSE_ERRORS:
             return None
-        total = len(data.get("processed", []))
-        statuses = {}
-        for item in data.get("processed", []):
-            statuses[item.get("status", "unknown")] = statuses.get(item.get("status", "unknown"), 0) + 1
-        parts = [f"Processed entries: {total}"]
+        parts = [f"Processed entries: {sum(statuses.values())}"]
         for key, value in sorted(statuses.items()):
             parts.append(f"{key}: {value}")
         return "; ".join(parts)
 
-    def _build_command(self) -> list[str]:
+    @staticmethod
+    def _iter_manifest_items(manifest: Path) -> Iterable[dict]:
+        if ijson is not None:
+            # Stream the entries so long runs do not load the whole manifest at once
+            with manifest.open("rb") as f:
+                yield from ijson.items(f, "processed.item")
+            return
+        yield from _json_loads(manifest.read_bytes()).get("processed", [])
+
+    def _build_argv(self) -> list[str]:
         command = [
-            sys.executable,
-            str(SCRIPT_DIR / "batch_process_dds.py"),
             "--input",
             format_path(self.input_var.get()),
             "--output",
@@ -355,6 +566,12 @@ class BatchGUI(tk.Tk):
             command.append("--overwrite")
         if self.dry_run_var.get():
             command.append("--dry-run")
+        try:
+            workers = self.workers_var.get()
+        except tk.TclError:
+            workers = 0  # not a number; leave the CLI default
+        if workers > 0:
+            command.extend(["--jobs", str(workers)])
         if self.git_commit_var.get():
             command.append("--git-commit")
         if self.git_push_var.get():
@@ -370,9 +587,7 @@ class BatchGUI(tk.Tk):
     def _finish_run(self, summary: Optional[str] = None, error: Optional[str] = None) -> None:
         self.progress.stop()
         self.progress.configure(mode="determinate")
-        self.progress_var.set(100)
 
-        self.current_process = None
         self.stop_button.state(["disabled"])
 
         if summary:
@@ -386,10 +601,41 @@ class BatchGUI(tk.Tk):
             self.progress_var.set(0)
         else:
             self._set_status("Done", color=self.success_color)
+            self.progress_var.set(100)
         self.stop_requested = False
         self._update_file_count()
         self.start_button.state(["!disabled"])
 
+    def _update_progress_from(self, lines: list[str]) -> None:
+        # Only the newest "[i/N]" line in the batch matters
+        for line in reversed(lines):
+            match = PROGRESS_RE.match(line)
+            if match:
+                break
+        else:
+            return
+        current, total = int(match.group(1)), int(match.group(2))
+        if not total:
+            return
+        if str(self.progress.cget("mode")) != "determinate":
+            # Real progress is available; drop the animated placeholder
+            self.progress.stop()
+            self.progress.configure(mode="determinate")
+        self.progress_var.set(100 * current / total)
+
+    def _animating(self) -> bool:
+        running = self.process_thread is not None and self.process_thread.is_alive()
+        return running and str(self.progress.cget("mode")) == "indeterminate"
+
+    def _pause_animation(self, event: tk.Event) -> None:
+        # Root bindings also see child widgets' events; only the window itself counts
+        if event.widget is self and self._animating():
+            self.progress.stop()
+
+    def _resume_animation(self, event: tk.Event) -> None:
+        if event.widget is self and self._animating():
+            self.progress.start(PROGRESS_STEP_MS)
+
     def _set_status(self, text: str, color: str) -> None:
         self.status_var.set(text)
         self.status_label.configure(foreground=color)